@@ -5,11 +5,26 @@ import joblib
 import os
 from pathlib import Path
 
+# Risk-level cut points; 0.5 is the class boundary
+RISK_CUT_POINTS = (0.3, 0.5, 0.7)
+
+def risk_bucket(probability):
+    """Get the (risk level, class) bucket a probability falls in"""
+    return (probability >= 0.3, probability >= 0.7, probability > 0.5)
+
 class DiabetesPredictionModel:
-    def __init__(self):
+    def __init__(self, use_cascade=True, early_exit_tolerance=None):
+        if early_exit_tolerance is not None and not 0 <= early_exit_tolerance <= 0.5:
+            raise ValueError("Early exit tolerance must be between 0-0.5")
+        
         self.model = None
         self.scaler = None
+        self.distilled_model = None
         self.metadata = None
+        self.use_cascade = use_cascade
+        self.early_exit_tolerance = early_exit_tolerance
+        self.tier_counts = {'fast': 0, 'forest': 0}
+        self.tree_counts = {'evaluations': 0, 'trees_evaluated': 0}
         self.models_dir = Path(__file__).parent / 'models'
         
     def load_model(self):
@@ -17,6 +32,7 @@ class DiabetesPredictionModel:
         try:
             model_path = self.models_dir / 'diabetes_model.joblib'
             scaler_path = self.models_dir / 'scaler.joblib'
+            distilled_path = self.models_dir / 'distilled_model.joblib'
             metadata_path = self.models_dir / 'model_metadata.json'
             
             if not model_path.exists():
@@ -25,6 +41,9 @@ class DiabetesPredictionModel:
             self.model = joblib.load(model_path)
             self.scaler = joblib.load(scaler_path)
             
+            if distilled_path.exists():
+                self.distilled_model = joblib.load(distilled_path)
+            
             if metadata_path.exists():
                 with open(metadata_path, 'r') as f:
                     self.metadata = json.load(f)
@@ -35,6 +54,81 @@ class DiabetesPredictionModel:
             print(f"Error loading model: {e}", file=sys.stderr)
             return False
     
+    def get_cascade_margin(self):
+        """Get the distance from a cut point the fast tier must clear"""
+        if not self.use_cascade or self.distilled_model is None:
+            return None
+        if not self.metadata or 'cascade' not in self.metadata:
+            return None
+        return self.metadata['cascade']['margin']
+    
+    def predict_probability(self, features_scaled):
+        """Get diabetes probability, answering confident cases with the distilled model"""
+        margin = self.get_cascade_margin()
+        
+        if margin is not None:
+            fast_probability = float(np.clip(self.distilled_model.predict(features_scaled)[0], 0, 1))
+            if min(abs(fast_probability - cut) for cut in RISK_CUT_POINTS) > margin:
+                self.tier_counts['fast'] += 1
+                return fast_probability, 'fast', 0
+        
+        self.tier_counts['forest'] += 1
+        if self.early_exit_tolerance is not None:
+            probability, trees_evaluated = self.predict_probability_early_exit(features_scaled)
+        else:
+            probability = float(self.model.predict_proba(features_scaled)[0][1])
+            trees_evaluated = len(self.model.estimators_)
+        
+        self.tree_counts['evaluations'] += 1
+        self.tree_counts['trees_evaluated'] += trees_evaluated
+        return probability, 'forest', trees_evaluated
+    
+    def predict_probability_early_exit(self, features_scaled):
+        """Score trees in order until the remaining ones cannot change the bucket.
+        
+        Every tree contributes a probability in [0, 1], so after k of n trees
+        the forest average is bounded by [sum / n, (sum + n - k) / n]. The
+        midpoint of that bound is returned once both ends share a risk level
+        and class and it is within the tolerance of the full forest average.
+        """
+        trees = self.model.estimators_
+        n_trees = len(trees)
+        features = features_scaled.astype(np.float32)
+        
+        total = 0.0
+        for evaluated, tree in enumerate(trees, start=1):
+            total += tree.predict_proba(features, check_input=False)[0][1]
+            lower = total / n_trees
+            upper = (total + n_trees - evaluated) / n_trees
+            
+            if (upper - lower) / 2 <= self.early_exit_tolerance and risk_bucket(lower) == risk_bucket(upper):
+                break
+        
+        return float((lower + upper) / 2), evaluated
+    
+    def get_cascade_stats(self):
+        """Get the fraction of requests routed to each tier and the trained agreement"""
+        total = sum(self.tier_counts.values())
+        stats = {
+            'requests': total,
+            'fast_tier_fraction': self.tier_counts['fast'] / total if total else 0.0,
+            'forest_tier_fraction': self.tier_counts['forest'] / total if total else 0.0
+        }
+        if self.metadata and 'cascade' in self.metadata:
+            stats['risk_level_agreement'] = self.metadata['cascade'].get('risk_level_agreement')
+        return stats
+    
+    def get_early_exit_stats(self):
+        """Get the average number of trees evaluated per forest evaluation"""
+        evaluations = self.tree_counts['evaluations']
+        average = self.tree_counts['trees_evaluated'] / evaluations if evaluations else 0.0
+        return {
+            'evaluations': evaluations,
+            'tolerance': self.early_exit_tolerance,
+            'average_trees_evaluated': average,
+            'average_tree_fraction': average / len(self.model.estimators_) if self.model else 0.0
+        }
+    
     def predict(self, input_data):
         """Make prediction on input data"""
         if not self.load_model():
@@ -85,12 +179,9 @@ class DiabetesPredictionModel:
         features_array = np.array([features])
         features_scaled = self.scaler.transform(features_array)
         
-        # Make prediction
-        prediction = self.model.predict(features_scaled)[0]
-        probability = self.model.predict_proba(features_scaled)[0]
-        
-        # Get probability for diabetes (class 1)
-        diabetes_probability = probability[1]
+        # Make prediction (class 1 wins only on a strict majority, as in the forest)
+        diabetes_probability, tier, trees_evaluated = self.predict_probability(features_scaled)
+        prediction = 1 if diabetes_probability > 0.5 else 0
         
         # Determine risk level
         if diabetes_probability < 0.3:
@@ -104,7 +195,7 @@ class DiabetesPredictionModel:
             risk_message = "High risk of diabetes detected."
         
         # Calculate confidence
-        confidence = max(probability) * 100
+        confidence = max(diabetes_probability, 1 - diabetes_probability) * 100
         
         return {
             "prediction": int(prediction),
@@ -116,7 +207,9 @@ class DiabetesPredictionModel:
             "input_features": dict(zip(feature_names, features)),
             "model_info": {
                 "accuracy": self.metadata.get('accuracy', 0) if self.metadata else 0,
-                "model_type": "Random Forest Classifier"
+                "model_type": "Random Forest Classifier",
+                "tier": tier,
+                "trees_evaluated": trees_evaluated
             }
         }
     
@@ -2,12 +2,24 @@ import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.tree import DecisionTreeRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 import joblib
 import os
 import json
 
+# Risk-level cut points used by the prediction API; 0.5 is the class boundary
+RISK_CUT_POINTS = (0.3, 0.5, 0.7)
+
+def risk_level(probability):
+    """Map a diabetes probability to its risk level"""
+    if probability < 0.3:
+        return "Low"
+    elif probability < 0.7:
+        return "Moderate"
+    return "High"
+
 def create_diabetes_dataset():
     """Create a comprehensive diabetes dataset based on medical research"""
     np.random.seed(42)
@@ -113,6 +125,42 @@ def create_diabetes_dataset():
     df = pd.DataFrame(data, columns=columns)
     return df
 
+def train_distilled_model(model, X_train_scaled, X_test_scaled, coverage=0.99):
+    """Train a shallow tree on the forest's probabilities for the fast cascade tier.
+
+    The margin is the ``coverage`` quantile of the distilled model's absolute
+    error on the held-out set; requests whose distilled probability lies
+    further than the margin from every cut point skip the full forest.
+    """
+    forest_train = model.predict_proba(X_train_scaled)[:, 1]
+    forest_test = model.predict_proba(X_test_scaled)[:, 1]
+
+    distilled = DecisionTreeRegressor(max_depth=8, min_samples_leaf=10, random_state=42)
+    distilled.fit(X_train_scaled, forest_train)
+
+    fast_test = distilled.predict(X_test_scaled)
+    margin = float(np.quantile(np.abs(fast_test - forest_test), coverage))
+
+    # Simulate the cascade on the held-out set
+    distance = np.min(np.abs(fast_test[:, None] - np.array(RISK_CUT_POINTS)), axis=1)
+    fast_mask = distance > margin
+    cascade_test = np.where(fast_mask, fast_test, forest_test)
+
+    risk_agreement = np.mean([
+        risk_level(c) == risk_level(f) for c, f in zip(cascade_test, forest_test)
+    ])
+    class_agreement = np.mean((cascade_test > 0.5) == (forest_test > 0.5))
+
+    stats = {
+        'model_type': 'DecisionTreeRegressor',
+        'margin': margin,
+        'fast_tier_fraction': float(fast_mask.mean()),
+        'forest_tier_fraction': float(1 - fast_mask.mean()),
+        'risk_level_agreement': float(risk_agreement),
+        'class_agreement': float(class_agreement)
+    }
+    return distilled, stats
+
 def train_diabetes_model():
     """Train a diabetes prediction model"""
     print("Creating diabetes dataset...")
@@ -180,18 +228,29 @@ def train_diabetes_model():
     print("\nFeature Importance:")
     print(feature_importance)
     
+    # Distill the forest into a fast first-tier model
+    print("\nTraining distilled cascade model...")
+    distilled, cascade_stats = train_distilled_model(model, X_train_scaled, X_test_scaled)
+    print(f"Cascade margin: {cascade_stats['margin']:.3f}")
+    print(f"Fast tier: {cascade_stats['fast_tier_fraction']*100:.1f}% of requests")
+    print(f"Forest tier: {cascade_stats['forest_tier_fraction']*100:.1f}% of requests")
+    print(f"Risk level agreement with forest: {cascade_stats['risk_level_agreement']*100:.1f}%")
+    
     # Save model and scaler
     models_dir = os.path.join(os.path.dirname(__file__), 'models')
     os.makedirs(models_dir, exist_ok=True)
     
     model_path = os.path.join(models_dir, 'diabetes_model.joblib')
     scaler_path = os.path.join(models_dir, 'scaler.joblib')
+    distilled_path = os.path.join(models_dir, 'distilled_model.joblib')
     
     joblib.dump(model, model_path)
     joblib.dump(scaler, scaler_path)
+    joblib.dump(distilled, distilled_path)
     
     print(f"\nModel saved to: {model_path}")
     print(f"Scaler saved to: {scaler_path}")
+    print(f"Distilled model saved to: {distilled_path}")
     
     # Save model metadata
     metadata = {
@@ -201,7 +260,8 @@ def train_diabetes_model():
         'n_samples': len(df),
         'n_features': len(X.columns),
         'diabetes_rate': float(df['Outcome'].mean()),
-        'feature_importance': feature_importance.to_dict('records')
+        'feature_importance': feature_importance.to_dict('records'),
+        'cascade': cascade_stats
     }
     
     metadata_path = os.path.join(models_dir, 'model_metadata.json')